@@ -1,18 +1,62 @@
 """Flask web frontend for photo-tagger."""
 
+import asyncio
+import hashlib
 import io
+import json
 import logging
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-from flask import Flask, render_template, request, jsonify, send_file, abort
-from .tagger import list_images, generate_thumbnail, overlay_text, is_tagged
+import diskcache
+from flask import (
+    Flask,
+    Response,
+    render_template,
+    request,
+    jsonify,
+    send_file,
+    abort,
+    stream_with_context,
+)
+from .tagger import (
+    scan_folder,
+    load_exif_summaries,
+    geocode_many,
+    generate_thumbnail,
+    overlay_text,
+    is_tagged,
+    is_tagged_fast,
+    list_tagged_names,
+    find_tagged_file,
+    log_pillow_build,
+    wait_for_save,
+)
 
 logger = logging.getLogger(__name__)
 
+THUMBNAIL_CACHE_DIR = Path.home() / ".cache" / "photo-tagger" / "thumbnails"
+THUMBNAIL_CACHE_SIZE_LIMIT = 500 * 2**20
+
+_thumbnail_cache = None
+
 
 app = Flask(__name__)
 
 
+def _get_thumbnail_cache():
+    """Return the on-disk cache of encoded thumbnails, opening it on first use."""
+    global _thumbnail_cache
+    if _thumbnail_cache is None:
+        _thumbnail_cache = diskcache.Cache(
+            str(THUMBNAIL_CACHE_DIR), size_limit=THUMBNAIL_CACHE_SIZE_LIMIT
+        )
+    return _thumbnail_cache
+
+
 @app.route("/")
 def index():
     """Serve the main page."""
@@ -36,9 +80,12 @@ def api_browse():
 
     dirs = []
     try:
-        for entry in sorted(folder.iterdir()):
-            if entry.is_dir() and not entry.name.startswith("."):
-                dirs.append(entry.name)
+        with os.scandir(folder) as it:
+            dirs = sorted(
+                entry.name
+                for entry in it
+                if entry.is_dir() and not entry.name.startswith(".")
+            )
     except PermissionError:
         logger.warning("Permission denied listing %s", folder)
 
@@ -66,10 +113,13 @@ def api_list_images():
     if not folder_path.is_dir():
         return jsonify({"error": f"Directory not found: {folder}"}), 404
 
-    images = list_images(folder_path)
     image_list = [
-        {"filename": img_path.name, "tagged": is_tagged(img_path)}
-        for img_path in images
+        {
+            "filename": img_path.name,
+            "tagged": tagged,
+            "capture_time": capture_time.isoformat() if capture_time else None,
+        }
+        for img_path, tagged, (_, capture_time) in scan_folder(folder_path)
     ]
 
     logger.info("Listed %d images in %s", len(image_list), folder_path)
@@ -93,85 +143,240 @@ def api_thumbnail(filename):
         abort(404)
 
     size = request.args.get("size", 300, type=int)
-    thumb = generate_thumbnail(str(image_path), max_size=size)
 
-    buf = io.BytesIO()
-    thumb.save(buf, format="JPEG")
-    buf.seek(0)
-    return send_file(buf, mimetype="image/jpeg")
-
-
-@app.route("/api/tag", methods=["POST"])
-def api_tag_image():
-    """Tag a single image.
-
-    JSON body: {"folder": "/absolute/path", "filename": "IMG_001.jpg"}
+    # A thumbnail only changes when the source file or requested size does
+    stat = image_path.stat()
+    etag = hashlib.blake2b(
+        f"{image_path}|{stat.st_mtime_ns}|{size}".encode(), digest_size=16
+    ).hexdigest()
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    cache = _get_thumbnail_cache()
+    data = cache.get(etag)
+    if data is None:
+        thumb = generate_thumbnail(str(image_path), max_size=size)
+        buf = io.BytesIO()
+        thumb.save(buf, format="JPEG")
+        data = buf.getvalue()
+        cache.set(etag, data)
+
+    response = send_file(io.BytesIO(data), mimetype="image/jpeg")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+def _tag_file(folder, filename, exif_summary=None, tagged_names=None):
+    """Tag one image in folder and return a (result, HTTP status) pair.
+
+    exif_summary, if given, is the image's entry from scan_folder, and
+    tagged_names a set from list_tagged_names to check instead of stat-ing.
     """
-    data = request.get_json()
-    if not data or "folder" not in data or "filename" not in data:
-        return jsonify({"error": "Missing folder or filename"}), 400
-
-    folder = Path(data["folder"])
-    filename = data["filename"]
     image_path = folder / filename
 
     if not image_path.is_file():
         return (
-            jsonify(
-                {
-                    "filename": filename,
-                    "status": "error",
-                    "message": f"File not found: {image_path}",
-                }
-            ),
+            {
+                "filename": filename,
+                "status": "error",
+                "message": f"File not found: {image_path}",
+            },
             404,
         )
 
     tagged_dir = folder / "tagged"
 
-    if is_tagged(image_path):
-        return jsonify(
+    if tagged_names is not None:
+        already_tagged = is_tagged_fast(filename, tagged_names)
+    else:
+        already_tagged = is_tagged(image_path)
+    if already_tagged:
+        return (
             {
                 "filename": filename,
                 "status": "skipped",
                 "message": "Already tagged",
-            }
+            },
+            200,
         )
 
     try:
-        output = overlay_text(str(image_path), output_dir=str(tagged_dir))
+        output = overlay_text(
+            str(image_path), output_dir=str(tagged_dir), exif_summary=exif_summary
+        )
         if output is None:
             logger.info("Skipped %s: no EXIF data", filename)
-            return jsonify(
+            return (
                 {
                     "filename": filename,
                     "status": "skipped",
                     "message": "No EXIF location or time data found",
-                }
+                },
+                200,
             )
         logger.info("Tagged %s -> %s", filename, Path(output).name)
-        return jsonify(
+        return (
             {
                 "filename": filename,
                 "status": "success",
                 "output": Path(output).name,
                 "message": "Tagged successfully",
-            }
+            },
+            200,
         )
     except Exception as e:
         logger.exception("Error tagging %s", filename)
         return (
-            jsonify(
-                {
-                    "filename": filename,
-                    "status": "error",
-                    "message": str(e),
-                }
-            ),
+            {
+                "filename": filename,
+                "status": "error",
+                "message": str(e),
+            },
             500,
         )
 
 
+def _finish_save(folder, result, status):
+    """Wait for a successful tag's background save, turning a failed save into an error result."""
+    if result["status"] != "success":
+        return result, status
+    try:
+        wait_for_save(folder / "tagged" / result["output"])
+    except Exception as e:
+        logger.exception("Error saving %s", result["filename"])
+        return (
+            {
+                "filename": result["filename"],
+                "status": "error",
+                "message": str(e),
+            },
+            500,
+        )
+    return result, status
+
+
+@app.route("/api/tag", methods=["POST"])
+def api_tag_image():
+    """Tag a single image.
+
+    JSON body: {"folder": "/absolute/path", "filename": "IMG_001.jpg"}
+    """
+    data = request.get_json()
+    if not data or "folder" not in data or "filename" not in data:
+        return jsonify({"error": "Missing folder or filename"}), 400
+
+    folder = Path(data["folder"])
+    result, status = _finish_save(folder, *_tag_file(folder, data["filename"]))
+    return jsonify(result), status
+
+
+@app.route("/api/tag_batch", methods=["POST"])
+def api_tag_batch():
+    """Tag several images concurrently.
+
+    JSON body: {"folder": "/absolute/path", "filenames": ["IMG_001.jpg", ...]}
+
+    Streams one JSON result per line (NDJSON) as each image finishes, in
+    completion order rather than request order. While locations are being
+    looked up, progress lines of the form
+    {"status": "geocoding", "located": N, "total": M} are interleaved.
+    """
+    data = request.get_json()
+    if not data or "folder" not in data or not isinstance(data.get("filenames"), list):
+        return jsonify({"error": "Missing folder or filenames"}), 400
+
+    folder = Path(data["folder"])
+    filenames = data["filenames"]
+    if not all(isinstance(filename, str) for filename in filenames):
+        return jsonify({"error": "filenames must be a list of strings"}), 400
+    if not folder.is_dir():
+        return jsonify({"error": f"Directory not found: {folder}"}), 404
+
+    # Reuse the EXIF summaries cached by the gallery scan, and list tagged/ once
+    summaries = load_exif_summaries(folder, filenames)
+    tagged_names = list_tagged_names(folder)
+
+    def generate():
+        # Images needing a location wait for their coordinates to be geocoded;
+        # everything else starts rendering right away.
+        waiting = {}
+        ready = []
+        for filename in filenames:
+            coords = summaries.get(filename, (None, None))[0]
+            if coords and not is_tagged_fast(filename, tagged_names):
+                waiting.setdefault(coords, []).append(filename)
+            else:
+                ready.append(filename)
+
+        # Worker threads and the geocoder report back through one queue, so
+        # results stream out while lookups are still running.
+        events = queue.Queue()
+        total_coords = len(waiting)
+        located = 0
+
+        def prefetch():
+            try:
+                asyncio.run(
+                    geocode_many(
+                        list(waiting), on_done=lambda c: events.put(("located", c))
+                    )
+                )
+            except Exception:
+                logger.exception("Error pre-geocoding batch in %s", folder)
+            finally:
+                events.put(("geocode_done", None))
+
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+
+            def submit(filename):
+                future = pool.submit(
+                    _tag_file, folder, filename, summaries.get(filename), tagged_names
+                )
+                future.add_done_callback(lambda f: events.put(("result", f)))
+
+            for filename in ready:
+                submit(filename)
+            if waiting:
+                threading.Thread(target=prefetch, daemon=True).start()
+                yield json.dumps(
+                    {"status": "geocoding", "located": 0, "total": total_coords}
+                ) + "\n"
+
+            remaining = len(filenames)
+            while remaining:
+                kind, value = events.get()
+                if kind == "result":
+                    # Workers move on to the next image while their output is
+                    # encoded; each result is reported once its file is written.
+                    result, _ = _finish_save(folder, *value.result())
+                    remaining -= 1
+                    yield json.dumps(result) + "\n"
+                elif kind == "located":
+                    for filename in waiting.pop(value, []):
+                        submit(filename)
+                    located += 1
+                    yield json.dumps(
+                        {
+                            "status": "geocoding",
+                            "located": located,
+                            "total": total_coords,
+                        }
+                    ) + "\n"
+                else:
+                    # Render anything the geocoder didn't get to; the
+                    # synchronous lookup retries it.
+                    for pending in waiting.values():
+                        for filename in pending:
+                            submit(filename)
+                    waiting.clear()
+
+    logger.info("Tagging batch of %d images in %s", len(filenames), folder)
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
 @app.route("/api/untag", methods=["POST"])
 def api_untag_image():
     """Delete the tagged version of a single image.
@@ -186,10 +391,9 @@ def api_untag_image():
     filename = data["filename"]
     image_path = folder / filename
 
-    p = Path(image_path)
-    tagged_file = folder / "tagged" / f"{p.stem}_tagged.png"
+    tagged_file = find_tagged_file(image_path)
 
-    if not tagged_file.exists():
+    if tagged_file is None:
         return jsonify({"filename": filename, "status": "not_found", "message": "No tagged file found"}), 404
 
     tagged_file.unlink()
@@ -203,6 +407,7 @@ def main():
         level=logging.INFO,
         format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
     )
+    log_pillow_build()
     app.run(debug=True, port=5001)
 
 
@@ -161,51 +161,71 @@ async function tagAll() {
     progressBar.style.display = "inline-block";
     progressBar.max = untagged.length;
     progressBar.value = 0;
+    progressText.textContent = `Tagging ${untagged.length} images\u2026`;
 
+    const byFilename = new Map(untagged.map((img) => [img.filename, img]));
+    let doneCount = 0;
     let successCount = 0;
+    let lastFilename = "";
+    let geocoding = null;
+
+    const showProgress = () => {
+        let text = `Tagged ${doneCount} of ${untagged.length}`;
+        if (lastFilename) text += `: ${lastFilename}`;
+        if (geocoding && geocoding.located < geocoding.total) {
+            text += ` (looking up locations ${geocoding.located} of ${geocoding.total})`;
+        }
+        progressText.textContent = text;
+    };
+
+    const handleResult = (result) => {
+        // Progress lines sent while the server geocodes the batch
+        if (result.status === "geocoding") {
+            geocoding = result;
+            showProgress();
+            return;
+        }
+        const img = byFilename.get(result.filename);
+        if (!img) return;
+        byFilename.delete(result.filename);
+        doneCount++;
+        lastFilename = img.filename;
+        progressBar.value = doneCount;
+        showProgress();
+        if (applyTagResult(img, result)) successCount++;
+    };
 
-    for (let i = 0; i < untagged.length; i++) {
-        const img = untagged[i];
-        progressText.textContent = `Tagging ${i + 1} of ${untagged.length}: ${img.filename}`;
-        progressBar.value = i;
-
-        try {
-            const resp = await fetch("/api/tag", {
-                method: "POST",
-                headers: { "Content-Type": "application/json" },
-                body: JSON.stringify({ folder: currentFolder, filename: img.filename }),
-            });
-            const result = await resp.json();
-
-            const card = imageGrid.querySelector(`[data-filename="${CSS.escape(img.filename)}"]`);
-            if (!card) continue;
-            const badge = card.querySelector(".badge");
-
-            if (result.status === "success") {
-                badge.className = "badge badge-tagged";
-                badge.textContent = "Tagged";
-                img.tagged = true;
-                successCount++;
-                const untagBtn = document.createElement("button");
-                untagBtn.className = "untag-btn";
-                untagBtn.textContent = "Untag";
-                untagBtn.addEventListener("click", () => untagImage(img, badge, untagBtn));
-                card.querySelector(".card-info").appendChild(untagBtn);
-            } else if (result.status === "skipped") {
-                badge.className = "badge badge-skipped";
-                badge.textContent = result.message;
-            } else {
-                badge.className = "badge badge-error";
-                badge.textContent = "Error";
-            }
-        } catch (err) {
-            const card = imageGrid.querySelector(`[data-filename="${CSS.escape(img.filename)}"]`);
-            if (card) {
-                const badge = card.querySelector(".badge");
-                badge.className = "badge badge-error";
-                badge.textContent = "Error";
+    try {
+        const resp = await fetch("/api/tag_batch", {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify({
+                folder: currentFolder,
+                filenames: untagged.map((img) => img.filename),
+            }),
+        });
+
+        // The response is NDJSON: one result object per line, streamed as each image finishes.
+        const reader = resp.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = "";
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            const lines = buffer.split("\n");
+            buffer = lines.pop();
+            for (const line of lines) {
+                if (line.trim()) handleResult(JSON.parse(line));
             }
         }
+        if (buffer.trim()) handleResult(JSON.parse(buffer));
+    } catch (err) {
+        // Fall through: anything without a result is marked as an error below.
+    }
+
+    for (const img of byFilename.values()) {
+        applyTagResult(img, { status: "error" });
     }
 
     progressBar.value = untagged.length;
@@ -214,6 +234,32 @@ async function tagAll() {
     loadBtn.disabled = false;
 }
 
+function applyTagResult(img, result) {
+    const card = imageGrid.querySelector(`[data-filename="${CSS.escape(img.filename)}"]`);
+    if (!card) return false;
+    const badge = card.querySelector(".badge");
+
+    if (result.status === "success") {
+        badge.className = "badge badge-tagged";
+        badge.textContent = "Tagged";
+        img.tagged = true;
+        const untagBtn = document.createElement("button");
+        untagBtn.className = "untag-btn";
+        untagBtn.textContent = "Untag";
+        untagBtn.addEventListener("click", () => untagImage(img, badge, untagBtn));
+        card.querySelector(".card-info").appendChild(untagBtn);
+        return true;
+    }
+    if (result.status === "skipped") {
+        badge.className = "badge badge-skipped";
+        badge.textContent = result.message;
+    } else {
+        badge.className = "badge badge-error";
+        badge.textContent = "Error";
+    }
+    return false;
+}
+
 async function untagImage(img, badge, untagBtn) {
     untagBtn.disabled = true;
     try {
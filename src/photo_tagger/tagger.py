@@ -1,25 +1,80 @@
 """Core photo tagging logic: EXIF extraction, geocoding, and text overlay."""
 
+import asyncio
+import functools
 import logging
+import os
+import sqlite3
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw, ImageFilter, ImageFont, ImageOps
+import diskcache
 import exifread
+from geopy.adapters import AioHTTPAdapter
 from geopy.geocoders import Nominatim
 
 logger = logging.getLogger(__name__)
 
 IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.tiff', '.bmp', '.heic'}
 
+# Suffixes a file in tagged/ may have, newest format first
+TAGGED_SUFFIXES = ('.jpg', '.png')
+
+# Overlay text layout, in pixels
+OVERLAY_PADDING = 30
+OVERLAY_LINE_SPACING = 4
+OVERLAY_SHADOW_OFFSET = 2
+OVERLAY_SHADOW_BLUR = 2
+
+# Per-folder sidecar holding EXIF summaries, keyed on (inode, mtime)
+SCAN_DB_NAME = ".phototagger.db"
+
+_SCAN_DB_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS exif ("
+    " inode INTEGER NOT NULL, mtime_ns INTEGER NOT NULL,"
+    " lat REAL, lon REAL, capture_time TEXT,"
+    " PRIMARY KEY (inode, mtime_ns))"
+)
+
+GEOCODE_CACHE_DIR = Path.home() / ".cache" / "photo-tagger" / "geocode"
+
+_geocode_cache = None
+
+# Encoding and writing output runs in the background so rendering of the
+# next image can overlap it. Futures are kept until they succeed, or until
+# wait_for_save / flush_saves collects a failure.
+_save_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="photo-tagger-save")
+_pending_saves = {}
+_pending_saves_lock = threading.Lock()
+
+# Nominatim's usage policy allows one request at a time; batch tagging
+# geocodes from several threads, so serialize the network calls.
+_nominatim_lock = threading.Lock()
+
+# Shared across calls so the underlying HTTP session (and its keep-alive
+# connection) is reused
+_geolocator = Nominatim(user_agent="photo-tagger")
+
+
+def log_pillow_build():
+    """Log the Pillow build in use and warn if it is not Pillow-SIMD."""
+    version = Image.core.PILLOW_VERSION
+    if ".post" in version:
+        logger.info("Using Pillow-SIMD %s", version)
+    else:
+        logger.warning("Using stock Pillow %s; install pillow-simd for faster resizing", version)
+
 
 def get_decimal_coords(tags):
     """Convert GPS coordinates from EXIF format to decimal degrees."""
     def to_decimal(values, ref):
-        d, m, s = [float(v.num) / float(v.den) for v in values.values]
-        decimal = d + m / 60 + s / 3600
+        d, m, s = values.values
+        decimal = d.num / d.den + m.num / (m.den * 60) + s.num / (s.den * 3600)
         if ref in ['S', 'W']:
             decimal = -decimal
         return decimal
@@ -29,16 +84,109 @@ def get_decimal_coords(tags):
     return lat, lon
 
 
+def _get_geocode_cache():
+    """Return the on-disk geocode cache, opening it on first use."""
+    global _geocode_cache
+    if _geocode_cache is None:
+        _geocode_cache = diskcache.Cache(str(GEOCODE_CACHE_DIR))
+    return _geocode_cache
+
+
 def get_location_string(lat, lon):
-    """Reverse geocode coordinates to a location string."""
-    for i in range(2):
-        try:
-            geolocator = Nominatim(user_agent="photo-tagger")
-            location = geolocator.reverse(f"{lat}, {lon}", language="en")
-        except Exception as e:
-            logger.warning("Error reverse geocoding coordinates: %s", e)
-            time.sleep(2)
+    """Reverse geocode coordinates to a location string.
 
+    Coordinates are rounded to 3 decimal places (~100 m) so nearby photos
+    share one lookup.
+    """
+    return _cached_location_string(round(lat, 3), round(lon, 3))
+
+
+@functools.lru_cache(maxsize=4096)
+def _cached_location_string(lat, lon):
+    """Look up a rounded coordinate on disk, falling back to Nominatim."""
+    cache = _get_geocode_cache()
+    key = (lat, lon)
+    if key in cache:
+        return cache[key]
+
+    location = _reverse_geocode(lat, lon)
+    cache[key] = location
+    return location
+
+
+def _reverse_geocode(lat, lon):
+    """Query Nominatim for a location string."""
+    with _nominatim_lock:
+        for i in range(2):
+            try:
+                location = _geolocator.reverse(f"{lat}, {lon}", language="en")
+                break
+            except Exception as e:
+                logger.warning("Error reverse geocoding coordinates: %s", e)
+                if i == 1:
+                    # Let the error propagate so the failure isn't cached
+                    raise
+                time.sleep(2)
+
+    return _format_location(location, lat, lon)
+
+
+async def geocode_many(coords, on_done=None):
+    """Reverse geocode many (lat, lon) pairs ahead of time, filling the geocode cache.
+
+    Only coordinates missing from the on-disk cache hit the network. Lookups
+    run as concurrent tasks but a semaphore and a one second pause keep them
+    within Nominatim's one-request-per-second usage policy; they also take
+    the same lock as the synchronous path, so the two never overlap. Failed
+    lookups are logged and left uncached, so get_location_string retries
+    them later.
+
+    on_done, if given, is called with each input pair once its lookup has
+    finished (immediately for pairs that are already cached).
+    """
+    cache = _get_geocode_cache()
+    by_key = {}
+    for lat, lon in coords:
+        by_key.setdefault((round(lat, 3), round(lon, 3)), []).append((lat, lon))
+
+    def done(key):
+        if on_done is not None:
+            for pair in by_key[key]:
+                on_done(pair)
+
+    keys = []
+    for key in by_key:
+        if key in cache:
+            done(key)
+        else:
+            keys.append(key)
+    if not keys:
+        return
+
+    logger.info("Pre-geocoding %d coordinates", len(keys))
+    semaphore = asyncio.Semaphore(1)
+    async with Nominatim(user_agent="photo-tagger", adapter_factory=AioHTTPAdapter) as geolocator:
+
+        async def lookup(lat, lon):
+            async with semaphore:
+                await asyncio.to_thread(_nominatim_lock.acquire)
+                try:
+                    location = await geolocator.reverse(f"{lat}, {lon}", language="en")
+                    cache[(lat, lon)] = _format_location(location, lat, lon)
+                except Exception as e:
+                    logger.warning("Error reverse geocoding coordinates: %s", e)
+                finally:
+                    # Hold the lock through the pause so the spacing applies
+                    # to synchronous lookups too
+                    await asyncio.sleep(1)
+                    _nominatim_lock.release()
+            done((lat, lon))
+
+        await asyncio.gather(*(lookup(lat, lon) for lat, lon in keys))
+
+
+def _format_location(location, lat, lon):
+    """Turn a Nominatim result into a short location string."""
     if not location:
         logger.info("No location found for coordinates: %s, %s", lat, lon)
         return None
@@ -60,10 +208,19 @@ def get_location_string(lat, lon):
     return country or "Unknown"
 
 
-def get_exif_data(image_path):
-    """Extract location and datetime from EXIF."""
+def read_exif_summary(image_path):
+    """Read capture time and GPS coordinates from EXIF, without geocoding.
+
+    Returns a (coords, capture_time) tuple where coords is a (lat, lon)
+    pair; either element is None if missing.
+    """
+    # GPS tags are read as part of IFD0, so stopping at DateTimeOriginal in the
+    # EXIF IFD still yields everything we need; skip MakerNotes and thumbnails
+    # (extract_thumbnail needs exifread 3.1.0+).
     with open(image_path, 'rb') as f:
-        tags = exifread.process_file(f)
+        tags = exifread.process_file(
+            f, stop_tag='DateTimeOriginal', details=False, extract_thumbnail=False
+        )
 
     # Get capture time
     capture_time = None
@@ -71,12 +228,18 @@ def get_exif_data(image_path):
         dt_str = str(tags['EXIF DateTimeOriginal'])
         capture_time = datetime.strptime(dt_str, "%Y:%m:%d %H:%M:%S")
 
-    # Get GPS location
-    location = None
+    # Get GPS coordinates
+    coords = None
     if 'GPS GPSLatitude' in tags and 'GPS GPSLongitude' in tags:
-        lat, lon = get_decimal_coords(tags)
-        location = get_location_string(lat, lon)
+        coords = get_decimal_coords(tags)
+
+    return coords, capture_time
 
+
+def get_exif_data(image_path):
+    """Extract location and datetime from EXIF."""
+    coords, capture_time = read_exif_summary(image_path)
+    location = get_location_string(*coords) if coords else None
     return location, capture_time
 
 
@@ -89,34 +252,81 @@ def fit_to_16_9(img, max_width=1920):
     canvas_width = min(img.width, max_width)
     canvas_height = int(canvas_width / target_ratio)
 
-    # Scale the image to fit within the canvas while preserving aspect ratio
+    # The letterbox fill below assumes an RGB image
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+
+    if img.width <= max_width:
+        # Already 16:9 and within the size limit: nothing to do
+        if abs(img_ratio - target_ratio) < 0.01:
+            return img
+
+        # Wider than 16:9 but within the size limit: the image already fits the
+        # canvas width, so letterbox it without resampling
+        if img_ratio > target_ratio:
+            canvas = Image.new('RGB', (canvas_width, canvas_height), (0, 0, 0))
+            canvas.paste(img, (0, (canvas_height - img.height) // 2))
+            return canvas
+
+    # Size the image will be scaled to within the canvas
     if img_ratio > target_ratio:
-        # Image is wider than 16:9 - fit to width
         new_width = canvas_width
         new_height = int(canvas_width / img_ratio)
     else:
-        # Image is taller than 16:9 - fit to height
         new_height = canvas_height
         new_width = int(canvas_height * img_ratio)
 
-    # Resize image
-    resized = img.resize((new_width, new_height), Image.LANCZOS)
+    # Drop most of the source pixels with a cheap integer box reduction so
+    # LANCZOS only has to cover the remaining (< 2x) scale step
+    factor = max(1, min(img.width // new_width, img.height // new_height))
+    if factor >= 2:
+        img = img.reduce(factor)
 
-    # Create black canvas and center the image
-    canvas = Image.new('RGB', (canvas_width, canvas_height), (0, 0, 0))
-    x_offset = (canvas_width - new_width) // 2
-    y_offset = (canvas_height - new_height) // 2
-    canvas.paste(resized, (x_offset, y_offset))
+    # Scale to fit within the canvas and center it on black in a single call
+    return ImageOps.pad(
+        img, (canvas_width, canvas_height), method=Image.LANCZOS,
+        color=(0, 0, 0), centering=(0.5, 0.5),
+    )
 
-    return canvas
+
+@functools.lru_cache(maxsize=32)
+def _load_font(size):
+    """Load the overlay font at the given size, cached across calls."""
+    try:
+        return ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", size)
+    except:
+        return ImageFont.load_default()
 
 
-def overlay_text(image_path, output_path=None, *, output_dir=None):
+@functools.lru_cache(maxsize=32)
+def _overlay_layout(canvas_width):
+    """Return the (font, line_height) used to overlay text on a canvas of this width.
+
+    Nearly every canvas is 1920 wide, so after the first image this is a
+    single cache hit.
+    """
+    # Font size based on image width
+    font = _load_font(max(16, canvas_width // 30))
+    # Same line advance as Pillow's multiline text
+    line_height = font.getbbox("A")[3] + OVERLAY_LINE_SPACING
+    return font, line_height
+
+
+def overlay_text(image_path, output_path=None, *, output_dir=None, exif_summary=None):
     """Overlay location and time on the image.
 
+    exif_summary is an optional (coords, capture_time) tuple from
+    scan_folder; when given, the EXIF data is not re-read.
+
+    The image is saved in the background; call wait_for_save with the
+    returned path (or flush_saves) before relying on the file.
+
     Returns the output path on success, or None if no EXIF data found.
     """
-    location, capture_time = get_exif_data(image_path)
+    if exif_summary is None:
+        exif_summary = read_exif_summary(image_path)
+    coords, capture_time = exif_summary
+    location = get_location_string(*coords) if coords else None
 
     if not location and not capture_time:
         logger.info("No EXIF location or time data found for %s", image_path)
@@ -124,72 +334,322 @@ def overlay_text(image_path, output_path=None, *, output_dir=None):
 
     img = Image.open(image_path)
 
+    # Let libjpeg decode at a reduced scale when the source is much larger than the canvas
+    if img.format == "JPEG":
+        img.draft("RGB", (1920, int(1920 * 9 / 16)))
+
     # Convert to 16:9 with max width 1920
     img = fit_to_16_9(img)
 
-    draw = ImageDraw.Draw(img)
-
     # Build text
     lines = []
     if location:
         lines.append(location)
     if capture_time:
         lines.append(capture_time.strftime("%B %d, %Y  %I:%M %p"))
-    text = "\n".join(lines)
-
-    # Font size based on image width
-    font_size = max(16, img.width // 30)
-    try:
-        font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", font_size)
-    except:
-        font = ImageFont.load_default()
-
-    # Position in bottom-right with padding
-    padding = 30
-    bbox = draw.textbbox((0, 0), text, font=font)
-    text_width, text_height = bbox[2] - bbox[0], bbox[3] - bbox[1]
-    x, y = img.width - text_width - padding, img.height - text_height - padding
 
-    # Draw shadow then text
-    draw.text((x+2, y+2), text, font=font, fill=(0, 0, 0, 200))
-    draw.text((x, y), text, font=font, fill=(255, 255, 255, 255))
+    # Measure each line once and lay them out ourselves so drawing doesn't re-measure
+    font, line_height = _overlay_layout(img.width)
+    bboxes = [font.getbbox(line) for line in lines]
+    text_width = max(bbox[2] for bbox in bboxes)
+    text_height = (len(lines) - 1) * line_height + bboxes[-1][3]
+
+    # Position in bottom-right with padding, keeping the textbbox convention of
+    # sizing the block from its ink origin (leftmost glyph, first line's top)
+    ink_left = min(bbox[0] for bbox in bboxes)
+    ink_top = bboxes[0][1]
+    x = img.width - (text_width - ink_left) - OVERLAY_PADDING
+    y = img.height - (text_height - ink_top) - OVERLAY_PADDING
+
+    # Rasterize the text once into a mask, with a margin so the blur isn't clipped
+    margin = 3 * OVERLAY_SHADOW_BLUR
+    mask = Image.new('L', (text_width + 2 * margin, text_height + 2 * margin), 0)
+    mask_draw = ImageDraw.Draw(mask)
+    for i, line in enumerate(lines):
+        mask_draw.text((margin, margin + i * line_height), line, font=font, fill=255)
+
+    # Composite a blurred, offset copy as a soft shadow, then the sharp text
+    shadow = mask.filter(ImageFilter.GaussianBlur(OVERLAY_SHADOW_BLUR))
+    left, top = x - margin, y - margin
+    shadow_left, shadow_top = left + OVERLAY_SHADOW_OFFSET, top + OVERLAY_SHADOW_OFFSET
+    img.paste(
+        (0, 0, 0),
+        (shadow_left, shadow_top, shadow_left + mask.width, shadow_top + mask.height),
+        shadow,
+    )
+    img.paste((255, 255, 255), (left, top, left + mask.width, top + mask.height), mask)
 
     # Save
+    save_kwargs = {}
     if output_path is None:
         p = Path(image_path)
         if output_dir:
             output_dir = Path(output_dir)
             output_dir.mkdir(parents=True, exist_ok=True)
-            output_path = output_dir / f"{p.stem}_tagged.png"
+            output_path = output_dir / f"{p.stem}_tagged.jpg"
+            # Baseline, non-optimized encoding: a single Huffman pass and a
+            # single scan keep encode time down for batch tagging
+            save_kwargs = dict(
+                format="JPEG", quality=88, optimize=False, progressive=False,
+                subsampling="4:2:0",
+            )
         else:
             output_path = p.parent / f"{p.stem}_tagged{p.suffix}"
 
-    img.save(output_path)
+    output_path = str(output_path)
+    future = _save_pool.submit(img.save, output_path, **save_kwargs)
+    with _pending_saves_lock:
+        _pending_saves[output_path] = future
+    future.add_done_callback(functools.partial(_on_save_done, output_path))
+    return output_path
+
+
+def _on_save_done(output_path, future):
+    """Log a finished background save and drop it from the pending set if it succeeded."""
+    error = future.exception()
+    if error is not None:
+        logger.error("Error saving %s: %s", output_path, error)
+        return
     logger.info("Saved: %s", output_path)
-    return str(output_path)
+    with _pending_saves_lock:
+        if _pending_saves.get(output_path) is future:
+            del _pending_saves[output_path]
+
+
+def wait_for_save(output_path):
+    """Block until the background save of output_path finishes, re-raising any error."""
+    with _pending_saves_lock:
+        future = _pending_saves.pop(str(output_path), None)
+    if future is not None:
+        future.result()
+
+
+def flush_saves():
+    """Block until all background saves finish, re-raising the first error."""
+    with _pending_saves_lock:
+        futures = list(_pending_saves.values())
+        _pending_saves.clear()
+    for future in futures:
+        future.result()
+
+
+def _scan_image_entries(folder_path):
+    """Return name-sorted DirEntries for the image files in a folder, excluding tagged files.
+
+    DirEntry caches the file type from the directory read, so this avoids a
+    stat per file.
+    """
+    with os.scandir(folder_path) as it:
+        entries = []
+        for e in it:
+            stem, suffix = os.path.splitext(e.name)
+            if e.is_file() and suffix.lower() in IMAGE_EXTENSIONS and 'tagged' not in stem:
+                entries.append(e)
+    entries.sort(key=lambda e: e.name)
+    return entries
 
 
 def list_images(folder_path):
     """Return a sorted list of image file Paths in the folder, excluding tagged files."""
+    return [Path(e.path) for e in _scan_image_entries(folder_path)]
+
+
+def scan_folder(folder_path):
+    """Enumerate images in a folder along with their tagged state and EXIF summary.
+
+    Returns a name-sorted list of (path, tagged, exif_summary) tuples, where
+    exif_summary is the (coords, capture_time) tuple from read_exif_summary.
+    Summaries are persisted in a SQLite sidecar in the folder, so unchanged
+    files are not re-read on later scans. Files removed mid-scan are skipped.
+    """
     folder = Path(folder_path)
-    images = []
-    for f in sorted(folder.iterdir()):
-        if f.is_file() and f.suffix.lower() in IMAGE_EXTENSIONS and 'tagged' not in f.stem:
-            images.append(f)
-    return images
+    entries = _scan_image_entries(folder)
+    tagged_names = list_tagged_names(folder)
+    summaries = _load_exif_summaries(folder, entries)
+    return [
+        (Path(e.path), is_tagged_fast(e.name, tagged_names), summaries[e.name])
+        for e in entries
+        if e.name in summaries
+    ]
+
+
+def _open_scan_db(folder):
+    """Open the folder's EXIF sidecar DB, or an in-memory one if it is not writable."""
+    try:
+        # The DB is only a cache, so don't wait long on another writer's lock
+        conn = sqlite3.connect(folder / SCAN_DB_NAME, timeout=1)
+        conn.execute(_SCAN_DB_SCHEMA)
+    except sqlite3.Error as e:
+        logger.warning("Cannot use scan cache in %s: %s", folder, e)
+        conn = sqlite3.connect(":memory:")
+        conn.execute(_SCAN_DB_SCHEMA)
+    return conn
 
 
-def is_tagged(image_path):
-    """Check if a tagged version of this image already exists in the tagged/ subdirectory."""
+def _load_exif_summaries(folder, entries):
+    """Return {name: exif_summary} for the DirEntries, reading EXIF only for new or changed files.
+
+    Entries that have disappeared since the folder was listed are left out.
+    """
+    conn = _open_scan_db(folder)
+    try:
+        try:
+            cached = {
+                (inode, mtime_ns): (lat, lon, capture_time)
+                for inode, mtime_ns, lat, lon, capture_time in conn.execute(
+                    "SELECT inode, mtime_ns, lat, lon, capture_time FROM exif"
+                )
+            }
+        except sqlite3.Error as e:
+            logger.warning("Cannot read scan cache in %s: %s", folder, e)
+            cached = {}
+
+        summaries = {}
+        seen = set()
+        new_rows = []
+        for e in entries:
+            try:
+                st = e.stat()
+            except OSError:
+                # Deleted or renamed since the folder was listed
+                continue
+            key = (st.st_ino, st.st_mtime_ns)
+            seen.add(key)
+            if key in cached:
+                summaries[e.name] = _summary_from_row(*cached[key])
+                continue
+
+            try:
+                summary = read_exif_summary(e.path)
+            except Exception as ex:
+                logger.warning("Error reading EXIF from %s: %s", e.path, ex)
+                summaries[e.name] = (None, None)
+                continue
+            summaries[e.name] = summary
+            new_rows.append(_row_from_summary(key, summary))
+
+        # A failed write only costs a re-read on the next scan
+        stale = cached.keys() - seen
+        try:
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO exif VALUES (?, ?, ?, ?, ?)", new_rows)
+                conn.executemany("DELETE FROM exif WHERE inode = ? AND mtime_ns = ?", stale)
+        except sqlite3.Error as e:
+            logger.warning("Cannot update scan cache in %s: %s", folder, e)
+        return summaries
+    finally:
+        conn.close()
+
+
+def load_exif_summaries(folder_path, filenames):
+    """Return {name: exif_summary} for the named images in a folder.
+
+    Looks each file up in the folder's scan sidecar, reading EXIF only on a
+    miss, without listing the rest of the folder. Missing files and files
+    whose EXIF can't be read are left out.
+    """
+    folder = Path(folder_path)
+    conn = _open_scan_db(folder)
+    try:
+        summaries = {}
+        new_rows = []
+        for name in filenames:
+            path = folder / name
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            key = (st.st_ino, st.st_mtime_ns)
+
+            try:
+                row = conn.execute(
+                    "SELECT lat, lon, capture_time FROM exif WHERE inode = ? AND mtime_ns = ?",
+                    key,
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.warning("Cannot read scan cache in %s: %s", folder, e)
+                row = None
+            if row is not None:
+                summaries[name] = _summary_from_row(*row)
+                continue
+
+            try:
+                summary = read_exif_summary(path)
+            except Exception as ex:
+                logger.warning("Error reading EXIF from %s: %s", path, ex)
+                continue
+            summaries[name] = summary
+            new_rows.append(_row_from_summary(key, summary))
+
+        try:
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO exif VALUES (?, ?, ?, ?, ?)", new_rows)
+        except sqlite3.Error as e:
+            logger.warning("Cannot update scan cache in %s: %s", folder, e)
+        return summaries
+    finally:
+        conn.close()
+
+
+def _summary_from_row(lat, lon, capture_time):
+    """Convert a scan sidecar row back into an exif_summary tuple."""
+    coords = (lat, lon) if lat is not None else None
+    if capture_time is not None:
+        capture_time = datetime.fromisoformat(capture_time)
+    return coords, capture_time
+
+
+def _row_from_summary(key, summary):
+    """Convert an (inode, mtime_ns) key and exif_summary into a scan sidecar row."""
+    coords, capture_time = summary
+    lat, lon = coords if coords else (None, None)
+    return (*key, lat, lon, capture_time.isoformat() if capture_time else None)
+
+
+def find_tagged_file(image_path):
+    """Return the tagged version of this image in the tagged/ subdirectory, or None.
+
+    Tagged files are written as JPEG; older runs wrote PNG, so both are checked.
+    """
     p = Path(image_path)
     tagged_dir = p.parent / "tagged"
-    tagged_file = tagged_dir / f"{p.stem}_tagged.png"
-    return tagged_file.exists()
+    for suffix in TAGGED_SUFFIXES:
+        tagged_file = tagged_dir / f"{p.stem}_tagged{suffix}"
+        if tagged_file.exists():
+            return tagged_file
+    return None
+
+
+def is_tagged(image_path):
+    """Check if a tagged version of this image already exists in the tagged/ subdirectory."""
+    return find_tagged_file(image_path) is not None
+
+
+def list_tagged_names(folder_path):
+    """Return the set of file names in the folder's tagged/ subdirectory.
+
+    Lets callers checking many images use is_tagged_fast instead of one
+    stat per image.
+    """
+    try:
+        with os.scandir(Path(folder_path) / "tagged") as it:
+            return {e.name for e in it}
+    except OSError:
+        # Missing or unreadable: treat as nothing tagged, as Path.exists() would
+        return set()
+
+
+def is_tagged_fast(image_name, tagged_names):
+    """Check if a tagged version of this image is in a set from list_tagged_names."""
+    stem = os.path.splitext(image_name)[0]
+    return any(f"{stem}_tagged{suffix}" in tagged_names for suffix in TAGGED_SUFFIXES)
 
 
 def generate_thumbnail(image_path, max_size=300):
     """Return a Pillow Image resized for thumbnail display."""
     img = Image.open(image_path)
+    if img.format == "JPEG":
+        img.draft("RGB", (max_size, max_size))
     img.thumbnail((max_size, max_size), Image.LANCZOS)
     return img
 
@@ -201,4 +661,6 @@ def _cli_main():
         sys.exit(1)
     image_path = sys.argv[1]
     output_path = sys.argv[2] if len(sys.argv) > 2 else None
+    log_pillow_build()
     overlay_text(image_path, output_path)
+    flush_saves()
@@ -2,7 +2,7 @@
 """CLI entry point for photo-tagger (preserved for backward compatibility)."""
 
 import sys
-from src.photo_tagger.tagger import overlay_text
+from src.photo_tagger.tagger import overlay_text, flush_saves, log_pillow_build
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
@@ -11,4 +11,6 @@ if __name__ == "__main__":
 
     image_path = sys.argv[1]
     output_path = sys.argv[2] if len(sys.argv) > 2 else None
+    log_pillow_build()
     overlay_text(image_path, output_path)
+    flush_saves()